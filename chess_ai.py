@@ -0,0 +1,41 @@
+import random
+
+import chess_profile
+from chess_moves import legal_moves
+
+
+# Piece values for AI targeting
+target_values = {
+    'Pawn': 1,
+    'Knight': 3,
+    'Bishop': 3,
+    'Rook': 5,
+    'Queen': 9,
+    'King': 1000
+}
+
+
+def select_greedy_move(board, color, last_pawn_double_move):
+    """Returns (start, end) of the best capture for color, else a random legal move, else None"""
+    opponent = 'black' if color == 'white' else 'white'
+    best_capture = None
+    highest_value = -1
+
+    moves = legal_moves(board, color, last_pawn_double_move)
+    if chess_profile.enabled:
+        chess_profile.count('evaluate', len(moves))
+
+    for start, end in moves:
+        target = board[end[0]][end[1]]
+        if target != ' ' and target.color == opponent:
+            value = target_values.get(target.__class__.__name__,0)
+            if value > highest_value:
+                best_capture = (start, end)
+                highest_value = value
+
+    # Choose the best capture or fallback to random legal move
+    if best_capture:
+        return best_capture
+    if moves:
+        return random.choice(moves)
+    return None
@@ -0,0 +1,369 @@
+import argparse
+import mmap
+import os
+import struct
+from array import array
+
+from chess_board import ChessBoard
+from chess_piece import Pawn, Knight, Bishop, King
+from chess_moves import legal_moves, make_move, is_in_check, position_hash, castling_rights, promotion_pieces
+from chess_ai import select_greedy_move, target_values
+from chess_notation import to_pgn
+
+
+# Shards are a 16 byte header followed by fixed size little-endian records.
+# Header: 8 byte magic, uint32 record size, uint32 record count. The count
+# is filled in when the shard is closed, so readers reject unfinished shards.
+# Records:
+#   hash      uint64   Zobrist hash of the position
+#   board     32 bytes two squares per byte, low nibble first, a8..h1
+#                      0 empty, 1-6 white PNBRQK, 7-12 black pnbrqk
+#   side      uint8    0 white to move, 1 black to move
+#   castling  uint8    bits: white O-O, white O-O-O, black O-O, black O-O-O
+#   ep_file   uint8    file of the en passant pawn, 255 if none
+#   score     int16    search score in centipawns, white's point of view
+#   result    int8     1 white won, 0 draw, -1 black won, 2 unknown (the game
+#                      stopped, e.g. at the self-play ply cap, before mate or stalemate)
+#   move_from uint8    best move start square (row * 8 + col)
+#   move_to   uint8    best move end square
+#   ply       uint16   half moves since the start of the game
+
+SHARD_MAGIC = b'CHSHARD1'
+HEADER_SIZE = 16
+RECORD = struct.Struct('<Q32sBBBhbBBH')
+PIECE_CODES = {symbol: code for code, symbol in enumerate('PNBRQKpnbrqk', 1)}
+PIECE_SYMBOLS = ' PNBRQKpnbrqk'
+RESULT_UNKNOWN = 2
+
+numpy_fields = [
+    ('hash', '<u8'),
+    ('board', 'u1', (32,)),
+    ('side', 'u1'),
+    ('castling', 'u1'),
+    ('ep_file', 'u1'),
+    ('score', '<i2'),
+    ('result', 'i1'),
+    ('move_from', 'u1'),
+    ('move_to', 'u1'),
+    ('ply', '<u2')
+]
+
+
+def encode_board(board):
+    """Packs the 64 squares into 32 bytes, one nibble per square"""
+    packed = bytearray(32)
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece != ' ':
+                square = row * 8 + col
+                packed[square >> 1] |= PIECE_CODES[str(piece)] << (4 * (square & 1))
+    return bytes(packed)
+
+
+def decode_board(packed):
+    """Inverse of encode_board, returns 8 rows of piece symbols with ' ' for empty"""
+    squares = []
+    for byte in bytes(packed):
+        squares.append(PIECE_SYMBOLS[byte & 0x0F])
+        squares.append(PIECE_SYMBOLS[byte >> 4])
+    return [squares[row * 8:row * 8 + 8] for row in range(8)]
+
+
+def material_score(board):
+    """Material balance in centipawns from white's point of view"""
+    score = 0
+    for row in board:
+        for piece in row:
+            if piece != ' ':
+                value = 100 * target_values.get(piece.__class__.__name__, 0)
+                score += value if piece.color == 'white' else -value
+    return score
+
+
+def make_sample(board, color, last_pawn_double_move, move, ply, promotion='q'):
+    """
+    One record without its result, which is only known at the end of the
+    game. The score is the material balance after the chosen move, worked
+    out from what the move captures and promotes to.
+    """
+    start, end = move
+    piece = board[start[0]][start[1]]
+    target = board[end[0]][end[1]]
+    gained = 0
+    if target != ' ':
+        gained += target_values[target.__class__.__name__]
+    elif isinstance(piece, Pawn) and start[1] != end[1]:
+        gained += target_values['Pawn']  # En passant
+    if isinstance(piece, Pawn) and end[0] in (0, 7):
+        gained += target_values[promotion_pieces[promotion].__name__] - target_values['Pawn']
+    score = material_score(board) + (100 if color == 'white' else -100) * gained
+
+    rights = castling_rights(board)
+    return [
+        position_hash(board, color, last_pawn_double_move),
+        encode_board(board),
+        0 if color == 'white' else 1,
+        sum(1 << index for index, allowed in enumerate(rights) if allowed),
+        last_pawn_double_move[1] if last_pawn_double_move else 255,
+        max(-32768, min(32767, score)),
+        0,
+        move[0][0] * 8 + move[0][1],
+        move[1][0] * 8 + move[1][1],
+        ply
+    ]
+
+
+def insufficient_material(board):
+    """True when neither side can mate: bare kings, or one knight or bishop between them"""
+    others = [piece for row in board for piece in row if piece != ' ' and not isinstance(piece, King)]
+    return not others or (len(others) == 1 and isinstance(others[0], (Knight, Bishop)))
+
+
+def game_result(board, color, last_pawn_double_move):
+    """Result label for the final position of a game with color to move"""
+    if insufficient_material(board):
+        return 0
+    if legal_moves(board, color, last_pawn_double_move):
+        return RESULT_UNKNOWN  # Stopped before it was decided, not a draw
+    if is_in_check(board, color):
+        return -1 if color == 'white' else 1
+    return 0
+
+
+def self_play_game(max_plies=200, adjudicate=None):
+    """
+    Plays greedy AI against itself and returns the game's samples. Games
+    stop early once neither side has mating material and are scored as
+    draws. With adjudicate set, a game still undecided at max_plies where one
+    side leads by at least that many centipawns of material is scored as a
+    win for it instead of RESULT_UNKNOWN.
+    """
+    board = ChessBoard().board
+    color = 'white'
+    last_pawn_double_move = None
+    samples = []
+
+    for ply in range(max_plies):
+        if insufficient_material(board):
+            break  # Drawn, the rest would be kings shuffling around
+        move = select_greedy_move(board, color, last_pawn_double_move)
+        if move is None:
+            break
+        samples.append(make_sample(board, color, last_pawn_double_move, move, ply))
+        _, last_pawn_double_move = make_move(board, move[0], move[1], last_pawn_double_move)
+        color = 'black' if color == 'white' else 'white'
+
+    result = game_result(board, color, last_pawn_double_move)
+    if result == RESULT_UNKNOWN and adjudicate is not None:
+        balance = material_score(board)
+        if balance and abs(balance) >= adjudicate:
+            result = 1 if balance > 0 else -1
+    for sample in samples:
+        sample[6] = result
+    return samples
+
+
+def read_pgn_moves(path):
+    """SAN moves from a file written by play_game, move numbers dropped"""
+    moves = []
+    with open(path) as f:
+        for line in f:
+            moves += [token for token in line.split() if not token.endswith('.')]
+    return moves
+
+
+def replay_pgn_game(path):
+    """
+    Replays a saved game, labelling each position with the move played.
+    Raises ValueError if a move matches no legal move, or more than one:
+    to_pgn writes no disambiguation, so "Nd2" with knights on b1 and f3
+    cannot be replayed. Promotions must carry their piece, as in "e8=Q".
+    """
+    board = ChessBoard().board
+    color = 'white'
+    last_pawn_double_move = None
+    samples = []
+
+    for ply, san in enumerate(read_pgn_moves(path)):
+        matches = []
+        for start, end in legal_moves(board, color, last_pawn_double_move):
+            piece = board[start[0]][start[1]]
+            capture = board[end[0]][end[1]] != ' ' or (isinstance(piece, Pawn) and start[1] != end[1])
+            promotions = ('q', 'r', 'b', 'n') if isinstance(piece, Pawn) and end[0] in (0, 7) else (None,)
+            for promotion in promotions:
+                if to_pgn(piece, start, end, capture, promotion) == san:
+                    matches.append((start, end, promotion))
+        if not matches:
+            raise ValueError(f"{path}: illegal or unknown move {san!r} at ply {ply}")
+        if len(matches) > 1:
+            raise ValueError(f"{path}: ambiguous move {san!r} at ply {ply}")
+        start, end, promotion = matches[0]
+
+        samples.append(make_sample(board, color, last_pawn_double_move, (start, end), ply, promotion or 'q'))
+        _, last_pawn_double_move = make_move(board, start, end, last_pawn_double_move, promotion or 'q')
+        color = 'black' if color == 'white' else 'white'
+
+    result = game_result(board, color, last_pawn_double_move)
+    for sample in samples:
+        sample[6] = result
+    return samples
+
+
+class HashSet64:
+    """
+    Open addressing set of 64-bit hashes stored in a flat array, about
+    16 bytes per entry instead of a Python int in a set.
+    """
+    def __init__(self, capacity=1 << 16):
+        self.slots = array('Q', bytes(8 * capacity))
+        self.mask = capacity - 1
+        self.size = 0
+
+    def add(self, key):
+        """Adds key and returns True, or returns False if it was already present"""
+        key = key or 1  # 0 marks an empty slot
+        slots, mask = self.slots, self.mask
+        index = key & mask
+        while slots[index]:
+            if slots[index] == key:
+                return False
+            index = (index + 1) & mask
+        slots[index] = key
+        self.size += 1
+        if self.size * 2 > len(slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old_slots = self.slots
+        self.slots = array('Q', bytes(16 * len(old_slots)))
+        self.mask = len(self.slots) - 1
+        for key in old_slots:
+            if key:
+                index = key & self.mask
+                while self.slots[index]:
+                    index = (index + 1) & self.mask
+                self.slots[index] = key
+
+
+class ShardWriter:
+    """
+    Streams records into shard_00000.bin, shard_00001.bin, ... under
+    output_dir, starting a new shard every records_per_shard records.
+    """
+    def __init__(self, output_dir, records_per_shard=1 << 20, dedupe=True):
+        self.output_dir = output_dir
+        self.records_per_shard = records_per_shard
+        self.seen = HashSet64() if dedupe else None
+        self.shard_index = 0
+        self.shard_records = 0
+        self.written = 0
+        self.duplicates = 0
+        self.file = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _open_shard(self):
+        path = os.path.join(self.output_dir, f"shard_{self.shard_index:05d}.bin")
+        self.file = open(path, 'wb')
+        self.file.write(SHARD_MAGIC + struct.pack('<II', RECORD.size, 0))
+        self.shard_index += 1
+        self.shard_records = 0
+
+    def write(self, sample):
+        """Writes one sample, skipping positions already written when deduplicating"""
+        if self.seen is not None and not self.seen.add(sample[0]):
+            self.duplicates += 1
+            return False
+        if self.file is None or self.shard_records >= self.records_per_shard:
+            self.close()
+            self._open_shard()
+        self.file.write(RECORD.pack(*sample))
+        self.shard_records += 1
+        self.written += 1
+        return True
+
+    def close(self):
+        if self.file is not None:
+            self.file.seek(len(SHARD_MAGIC) + 4)
+            self.file.write(struct.pack('<I', self.shard_records))
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _check_header(header, path, size):
+    if header[:8] != SHARD_MAGIC or struct.unpack('<I', header[8:12])[0] != RECORD.size:
+        raise ValueError(f"{path} is not a training shard")
+    if struct.unpack('<I', header[12:16])[0] * RECORD.size != size - HEADER_SIZE:
+        raise ValueError(f"{path} is truncated or was not closed")
+
+
+def iter_records(path):
+    """Yields each record of a shard as a tuple, without NumPy"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        _check_header(f.read(HEADER_SIZE), path, size)
+        if size == HEADER_SIZE:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # unpack_from reads straight from the mapping; slicing it would copy the whole shard
+            for offset in range(HEADER_SIZE, len(data) - RECORD.size + 1, RECORD.size):
+                yield RECORD.unpack_from(data, offset)
+
+
+def load_shard(path):
+    """Memory maps a shard as a NumPy structured array (requires numpy)"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("load_shard requires numpy; use iter_records without it") from None
+
+    with open(path, 'rb') as f:
+        _check_header(f.read(HEADER_SIZE), path, os.fstat(f.fileno()).st_size)
+    return numpy.memmap(path, dtype=numpy.dtype(numpy_fields), mode='r', offset=HEADER_SIZE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export labelled positions to binary training shards")
+    parser.add_argument('--out', default='shards', help="output directory")
+    parser.add_argument('--records-per-shard', type=int, default=1 << 20)
+    parser.add_argument('--no-dedupe', action='store_true')
+    parser.add_argument('--skip-unknown', action='store_true',
+                        help="leave out games that ended without mate or stalemate")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--self-play', type=int, metavar='GAMES', help="number of self-play games")
+    source.add_argument('--pgn', nargs='+', metavar='FILE', help="games saved by play_game")
+    parser.add_argument('--max-plies', type=int, default=200,
+                        help="self-play game length limit. Games still undecided there are "
+                             "labelled unknown unless --adjudicate is given")
+    parser.add_argument('--adjudicate', type=int, metavar='CENTIPAWNS',
+                        help="score self-play games stopped at --max-plies as a win for the side "
+                             "ahead by at least this much material")
+    options = parser.parse_args()
+
+    if options.self_play is not None:
+        games = (self_play_game(options.max_plies, options.adjudicate) for _ in range(options.self_play))
+    else:
+        def replayed_games():
+            for path in options.pgn:
+                try:
+                    yield replay_pgn_game(path)
+                except ValueError as error:
+                    print(f"Skipping game: {error}")
+        games = replayed_games()
+
+    with ShardWriter(options.out, options.records_per_shard, not options.no_dedupe) as writer:
+        for samples in games:
+            if options.skip_unknown and samples and samples[0][6] == RESULT_UNKNOWN:
+                continue
+            for sample in samples:
+                writer.write(sample)
+
+    print(f"Wrote {writer.written} positions to {writer.shard_index} shard(s), skipped {writer.duplicates} duplicates")
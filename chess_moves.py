@@ -0,0 +1,316 @@
+import random
+import threading
+from collections import OrderedDict
+
+import chess_profile
+from chess_piece import Pawn, Rook, Knight, Bishop, Queen, King
+from chess_rays import rays, knight_squares, king_squares, sliding_targets, ORTHOGONAL, DIAGONAL, ALL_DIRECTIONS
+
+
+promotion_pieces = {
+    'q': Queen,
+    'r': Rook,
+    'b': Bishop,
+    'n': Knight
+}
+
+sliding_directions = {
+    Rook: ORTHOGONAL,
+    Bishop: DIAGONAL,
+    Queen: ALL_DIRECTIONS
+}
+
+# Zobrist keys, seeded so hashes are stable across processes and runs
+_zobrist_random = random.Random(20240601)
+zobrist_pieces = {
+    symbol: [_zobrist_random.getrandbits(64) for _ in range(64)]
+    for symbol in 'PNBRQKpnbrqk'
+}
+zobrist_black_to_move = _zobrist_random.getrandbits(64)
+zobrist_castling = [_zobrist_random.getrandbits(64) for _ in range(4)]  # White O-O, O-O-O, black O-O, O-O-O
+zobrist_en_passant = [_zobrist_random.getrandbits(64) for _ in range(8)]
+
+
+def castling_rights(board):
+    """Returns (white O-O, white O-O-O, black O-O, black O-O-O) as booleans"""
+    rights = []
+    for color, row in (('white', 7), ('black', 0)):
+        king = board[row][4]
+        king_ready = isinstance(king, King) and king.color == color and not king.has_moved
+        for rook_col in (7, 0):
+            rook = board[row][rook_col]
+            rights.append(
+                king_ready and isinstance(rook, Rook) and rook.color == color and not rook.has_moved
+            )
+    return tuple(rights)
+
+
+def position_hash(board, color, last_pawn_double_move):
+    """64-bit Zobrist hash of the position with color to move"""
+    key = 0
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece != ' ':
+                key ^= zobrist_pieces[str(piece)][row * 8 + col]
+    if color == 'black':
+        key ^= zobrist_black_to_move
+    for index, allowed in enumerate(castling_rights(board)):
+        if allowed:
+            key ^= zobrist_castling[index]
+    if last_pawn_double_move:
+        key ^= zobrist_en_passant[last_pawn_double_move[1]]
+    return key
+
+
+def make_move(board, start, end, last_pawn_double_move, promotion='q'):
+    """
+    Plays an already validated move on board.
+    Returns (capture, new last_pawn_double_move).
+    """
+    piece = board[start[0]][start[1]]
+    capture = board[end[0]][end[1]] != ' '
+
+    # En passant removes the pawn beside the start square
+    if isinstance(piece, Pawn) and last_pawn_double_move and abs(start[1] - end[1]) == 1 and board[end[0]][end[1]] == ' ':
+        board[last_pawn_double_move[0]][last_pawn_double_move[1]] = ' '
+        capture = True
+
+    if isinstance(piece, Pawn) and abs(start[0] - end[0]) == 2:
+        new_double_move = end
+    else:
+        new_double_move = None
+
+    if isinstance(piece, King) and abs(start[1] - end[1]) == 2:
+        row = start[0]
+        rook_col, new_rook_col = (7, 5) if end[1] == 6 else (0, 3)
+        rook = board[row][rook_col]
+        if isinstance(rook, Rook) and rook.color == piece.color:
+            board[row][new_rook_col] = rook
+            board[row][rook_col] = ' '
+            rook.position = (row, new_rook_col)
+            rook.has_moved = True
+
+    board[end[0]][end[1]] = piece
+    board[start[0]][start[1]] = ' '
+    piece.position = end
+    if isinstance(piece, (Pawn, King, Rook)):
+        piece.has_moved = True
+
+    if isinstance(piece, Pawn) and end[0] in (0, 7):
+        board[end[0]][end[1]] = promotion_pieces.get(promotion, Queen)(piece.color, end)
+
+    return capture, new_double_move
+
+
+def is_in_check(board, color):
+    """
+    Looks outward from the king square through the attack tables instead of
+    asking every enemy piece whether it can reach the king.
+    """
+    if chess_profile.enabled:
+        chess_profile.count('check_test')
+    king_pos = None
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if isinstance(piece, King) and piece.color == color:
+                king_pos = (row, col)
+                break
+        if king_pos:
+            break
+    if king_pos is None:
+        return False
+    row, col = king_pos
+
+    # The first piece on each ray is the only one that can attack along it
+    square_rays = rays[row][col]
+    for directions, attackers in ((ORTHOGONAL, (Rook, Queen)), (DIAGONAL, (Bishop, Queen))):
+        for index in directions:
+            for r, c in square_rays[index]:
+                piece = board[r][c]
+                if piece != ' ':
+                    if piece.color != color and isinstance(piece, attackers):
+                        return True
+                    break
+
+    for squares, attacker in ((knight_squares[row][col], Knight), (king_squares[row][col], King)):
+        for r, c in squares:
+            piece = board[r][c]
+            if piece != ' ' and piece.color != color and isinstance(piece, attacker):
+                return True
+
+    # Enemy pawns capture towards the king's side of the board
+    pawn_row = row - 1 if color == 'white' else row + 1
+    if 0 <= pawn_row < 8:
+        for c in (col - 1, col + 1):
+            if 0 <= c < 8:
+                piece = board[pawn_row][c]
+                if piece != ' ' and piece.color != color and isinstance(piece, Pawn):
+                    return True
+    return False
+
+
+def leaves_king_in_check(board, start, end, last_pawn_double_move):
+    """
+    Tries the move by swapping squares in place and restores them afterwards.
+    Piece attributes are never touched, so no board copy is needed.
+    """
+    piece = board[start[0]][start[1]]
+    changed = [start, end]
+
+    if isinstance(piece, Pawn) and last_pawn_double_move and start[1] != end[1] and board[end[0]][end[1]] == ' ':
+        changed.append(last_pawn_double_move)
+    rook = None
+    if isinstance(piece, King) and abs(start[1] - end[1]) == 2:
+        rook_col, new_rook_col = (7, 5) if end[1] == 6 else (0, 3)
+        rook = board[start[0]][rook_col]
+        changed += [(start[0], rook_col), (start[0], new_rook_col)]
+
+    saved = [board[r][c] for r, c in changed]
+    for r, c in changed:
+        board[r][c] = ' '
+    board[end[0]][end[1]] = piece
+    if rook is not None:
+        board[start[0]][new_rook_col] = rook
+
+    in_check = is_in_check(board, piece.color)
+
+    for (r, c), square in zip(changed, saved):
+        board[r][c] = square
+    return in_check
+
+
+def _castles_through_check(board, start, end):
+    """A king may not castle out of, or through, an attacked square"""
+    if is_in_check(board, board[start[0]][start[1]].color):
+        return True
+    middle = (start[0], (start[1] + end[1]) // 2)
+    return leaves_king_in_check(board, start, middle, None)
+
+
+def _pseudo_legal_targets(board, piece, start, last_pawn_double_move):
+    # Sliding pieces walk the precomputed rays instead of probing all 64 squares
+    directions = sliding_directions.get(type(piece))
+    if directions is not None:
+        if chess_profile.enabled:
+            chess_profile.count('ray_lookup')
+        return [
+            end for end in sliding_targets(board, start, directions)
+            if board[end[0]][end[1]] == ' ' or board[end[0]][end[1]].color != piece.color
+        ]
+
+    # Knights and kings take their squares from the jump tables, kings add castling
+    if isinstance(piece, (Knight, King)):
+        jumps = knight_squares if isinstance(piece, Knight) else king_squares
+        targets = [
+            end for end in jumps[start[0]][start[1]]
+            if board[end[0]][end[1]] == ' ' or board[end[0]][end[1]].color != piece.color
+        ]
+        if isinstance(piece, King):
+            for col in (start[1] - 2, start[1] + 2):
+                if 0 <= col < 8 and piece.is_valid_move(start, (start[0], col), board):
+                    targets.append((start[0], col))
+        return targets
+
+    targets = []
+    for r in range(8):
+        for c in range(8):
+            if chess_profile.enabled:
+                chess_profile.count('is_valid_move')
+            if isinstance(piece, Pawn):
+                valid = piece.is_valid_move(start, (r, c), board, last_pawn_double_move)
+            else:
+                valid = piece.is_valid_move(start, (r, c), board)
+            if valid:
+                targets.append((r, c))
+    return targets
+
+
+def generate_legal_moves(board, color, last_pawn_double_move):
+    """All legal (start, end) moves for color, without caching"""
+    if chess_profile.enabled:
+        chess_profile.count('movegen')
+    with chess_profile.Phase('movegen'):
+        moves = []
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece == ' ' or piece.color != color:
+                    continue
+                start = (row, col)
+                for end in _pseudo_legal_targets(board, piece, start, last_pawn_double_move):
+                    if isinstance(piece, King) and abs(col - end[1]) == 2 and _castles_through_check(board, start, end):
+                        continue
+                    if not leaves_king_in_check(board, start, end, last_pawn_double_move):
+                        moves.append((start, end))
+        return tuple(moves)
+
+
+class LegalMoveCache:
+    """
+    Bounded LRU cache of legal move sets keyed by Zobrist position hash.
+    Safe to share with the pondering thread.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # hash -> (moves tuple, moves frozenset)
+        self.lock = threading.Lock()  # Guards entries and counters; move generation runs outside it
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, board, color, last_pawn_double_move):
+        key = position_hash(board, color, last_pawn_double_move)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if chess_profile.enabled:
+            chess_profile.count('tt_probe')
+            chess_profile.count('tt_hit' if entry is not None else 'tt_miss')
+        if entry is not None:
+            return entry
+
+        moves = generate_legal_moves(board, color, last_pawn_double_move)
+        entry = (moves, frozenset(moves))
+        with self.lock:
+            self.entries[key] = entry
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+move_cache = LegalMoveCache()
+
+
+def legal_moves(board, color, last_pawn_double_move):
+    """Ordered tuple of legal (start, end) moves for color"""
+    return move_cache.lookup(board, color, last_pawn_double_move)[0]
+
+
+def is_legal_move(board, start, end, last_pawn_double_move):
+    piece = board[start[0]][start[1]]
+    if piece == ' ':
+        return False
+    return (start, end) in move_cache.lookup(board, piece.color, last_pawn_double_move)[1]
+
+
+def legal_destinations(board, start, last_pawn_double_move):
+    """Legal end squares for the piece on start, used for move hints"""
+    piece = board[start[0]][start[1]]
+    if piece == ' ':
+        return []
+    return [end for move_start, end in legal_moves(board, piece.color, last_pawn_double_move) if move_start == start]
+
+
+def has_no_legal_moves(board, color, last_pawn_double_move):
+    return not legal_moves(board, color, last_pawn_double_move)
@@ -0,0 +1,45 @@
+def parse_position(pos):
+    """Converts input like 'e2' to (row, col)"""
+    if len(pos) != 2:
+        return None
+    col = ord(pos[0].lower()) - ord('a')
+    row = 8 - int(pos[1])
+    if 0 <= row < 8 and 0 <= col < 8:
+        return row, col
+    return None
+
+
+def to_pgn(piece, start, end, capture=False, promotion=None):
+    col_names = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+    piece_map = {
+        'Pawn': '',
+        'Knight': 'N',
+        'Bishop': 'B',
+        'Rook': 'R',
+        'Queen': 'Q',
+        'King': 'K'
+    }
+
+    start_file = col_names[start[1]]
+    end_file = col_names[end[1]]
+    end_rank = str(8 - end[0])
+    piece_name = piece.__class__.__name__
+    symbol = piece_map.get(piece_name, '?')
+
+    # Promotion suffix: e8=Q
+    promoted = f"={promotion.upper()}" if promotion else ''
+
+    # Castling
+    if piece_name == 'King' and abs(start[1] - end[1]) == 2:
+        return "O-O" if end[1] == 6 else "O-O-O"
+
+    # Pawn capture: exd5
+    if piece_name == 'Pawn' and capture:
+        return f"{start_file}x{end_file}{end_rank}{promoted}"
+
+    # Regular capture: Nxe5
+    if capture:
+        return f"{symbol}x{end_file}{end_rank}"
+
+    # Normal move: Nf3 or e4
+    return f"{symbol}{end_file}{end_rank}{promoted}"
@@ -1,3 +1,5 @@
+from chess_rays import orthogonal_between, diagonal_between, all_between
+
 
 class ChessPiece:
     """
@@ -113,24 +115,13 @@ class Rook(ChessPiece):
         start_row, start_col = start_pos
         end_row, end_col = end_pos
 
-        if (
-            start_row != end_row and
-            start_col != end_col
-        ):
+        # Straight line with no obstacles, the squares in between come from the ray tables
+        between = orthogonal_between[start_row][start_col][end_row][end_col]
+        if between is None:
             return False  # Rook can only move in a straight line
-
-        # Horizontal or vertical movement - check of obstacles
-        if start_row == end_row:
-            step = 1 if end_col > start_col else -1
-            for col in range(start_col + step, end_col, step):
-                if board[start_row][col] != ' ':
-                    return False
-
-        elif start_col == end_col:
-            step = 1 if end_row > start_row else -1
-            for row in range(start_row + step, end_row, step):
-                if board[row][start_col] != ' ':
-                    return False
+        for row, col in between:
+            if board[row][col] != ' ':
+                return False
 
         # If destination square is occupied by same color piece, it's invalid
         target_piece = board[end_row][end_col]
@@ -148,21 +139,13 @@ class Bishop(ChessPiece):
         start_row, start_col = start_pos
         end_row, end_col = end_pos
 
-        # Check if the move is diagonal
-        if abs(end_row - start_row) != abs(end_col - start_col):
-            return False # Not a diagonal move
-
-        # Determine movement direction
-        row_step = 1 if end_row > start_row else -1
-        col_step = 1 if end_col > start_col else -1
-
-        # Check for obstructions along the diagonal path
-        row, col = start_row + row_step, start_col + col_step
-        while row!= end_row and col != end_col:
+        # Diagonal with no obstructions, the squares in between come from the ray tables
+        between = diagonal_between[start_row][start_col][end_row][end_col]
+        if between is None:
+            return False  # Not a diagonal move
+        for row, col in between:
             if board[row][col] != ' ':
                 return False  # Obstruction found
-            row += row_step
-            col += col_step
 
         # Ensure Bishop isn't capturing its own piece
         target_piece = board[end_row][end_col]
@@ -207,24 +190,13 @@ class Queen(ChessPiece):
         start_row, start_col = start_pos
         end_row, end_col = end_pos
 
-        # Check if move is straight like a rook
-        if start_row == end_row or start_col == end_col:
-            step_row = 0 if start_row == end_row else (1 if end_row > start_row else -1)
-            step_col = 0 if start_col == end_col else (1 if end_col > start_col else -1)
-        # Check if the move is diagonal
-        elif abs(start_row - end_row) == abs(start_col - end_col):
-            step_row = 1 if end_row > start_row else -1
-            step_col = 1 if end_col > start_col else -1
-        else:
+        # Straight or diagonal with no obstacles, the squares in between come from the ray tables
+        between = all_between[start_row][start_col][end_row][end_col]
+        if between is None:
             return False  # Not a valid Queen move
-
-        # Check for obstacles in the path
-        row, col = start_row + step_row, start_col + step_col
-        while (row, col) != (end_row, end_col):
+        for row, col in between:
             if board[row][col] != ' ':
                 return False  # Blocked path
-            row += step_row
-            col += step_col
 
         # Ensure Queen isn't capturing its own piece
         target_piece = board[end_row][end_col]
@@ -0,0 +1,83 @@
+import copy
+import threading
+
+from chess_moves import legal_moves, is_legal_move, make_move, position_hash
+
+
+def _is_playable(board, color, move, last_pawn_double_move):
+    # Guards against hash collisions: the reply must be a legal move for color here
+    start, end = move
+    piece = board[start[0]][start[1]]
+    return piece != ' ' and piece.color == color and is_legal_move(board, start, end, last_pawn_double_move)
+
+
+class Ponderer:
+    """
+    Searches the AI's replies on a background thread while the opponent is
+    thinking. The expected opponent move is searched first, then the rest of
+    their legal moves until stop() is called.
+
+    Replies are stored by the Zobrist hash of the position after the
+    opponent's move, so a ponder hit is a dictionary lookup. Legal move sets
+    computed here land in the shared move cache and are reused on a miss too.
+    """
+    def __init__(self, search):
+        self.search = search  # search(board, color, last_pawn_double_move) -> (start, end) or None
+        self.replies = {}  # position hash -> reply
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, board, color, last_pawn_double_move):
+        """Starts pondering for the position where color is about to move"""
+        self.stop()
+        self.replies = {}
+        self.stop_event.clear()
+        # The thread works on its own copy so the live board can change under it
+        self.thread = threading.Thread(
+            target=self._ponder,
+            args=(copy.deepcopy(board), color, last_pawn_double_move),
+            daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Aborts pondering and waits for the current candidate to finish"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def _ponder(self, board, color, last_pawn_double_move):
+        reply_color = 'black' if color == 'white' else 'white'
+        candidates = list(legal_moves(board, color, last_pawn_double_move))
+
+        expected = self.search(board, color, last_pawn_double_move)
+        if expected in candidates:
+            candidates.remove(expected)
+            candidates.insert(0, expected)
+
+        for start, end in candidates:
+            if self.stop_event.is_set():
+                return
+            trial = copy.deepcopy(board)
+            _, trial_double_move = make_move(trial, start, end, last_pawn_double_move)
+            key = position_hash(trial, reply_color, trial_double_move)
+            self.replies[key] = self.search(trial, reply_color, trial_double_move)
+
+    def take_reply(self, board, color, last_pawn_double_move):
+        """
+        Stops pondering and returns the reply searched for this position,
+        or None on a ponder miss.
+        """
+        self.stop()
+        reply = self.replies.get(position_hash(board, color, last_pawn_double_move))
+        self.replies = {}
+
+        if reply is not None and _is_playable(board, color, reply, last_pawn_double_move):
+            self.hits += 1
+            return reply
+
+        self.misses += 1
+        return None
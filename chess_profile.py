@@ -0,0 +1,91 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+from collections import Counter, defaultdict
+
+
+# Instrumentation is off by default. Hot paths guard every call with
+# "if chess_profile.enabled:" so the disabled cost is one attribute lookup.
+enabled = False
+counters = Counter()  # name -> number of calls
+timers = defaultdict(float)  # phase name -> seconds
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    counters.clear()
+    timers.clear()
+
+
+def count(name, amount=1):
+    counters[name] += amount
+
+
+class Phase:
+    """
+    Context manager adding the elapsed time of a block to timers[name].
+    Does nothing unless instrumentation is enabled.
+    """
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        if enabled:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.started is not None:
+            timers[self.name] += time.perf_counter() - self.started
+        return False
+
+
+def snapshot():
+    """Current counters and timers as plain dicts"""
+    return {
+        'counters': dict(counters),
+        'timers': {name: round(seconds, 6) for name, seconds in timers.items()}
+    }
+
+
+def profile_move(label, func, *args, output_dir='profile', extra=None):
+    """
+    Runs func(*args) under cProfile with fresh metrics, then writes
+    <output_dir>/<label>.pstats and <label>.json. Items of extra, such as
+    facts gathered before the call, are added to the JSON. Returns func's result.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    reset()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+        wall_time = time.perf_counter() - started
+
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(os.path.join(output_dir, f"{label}.pstats"))
+
+        metrics = snapshot()
+        metrics['move'] = label
+        metrics['wall_time'] = round(wall_time, 6)
+        metrics.update(extra or {})
+        with open(os.path.join(output_dir, f"{label}.json"), "w") as f:
+            json.dump(metrics, f, indent=2, sort_keys=True)
+    return result
@@ -0,0 +1,82 @@
+# Precomputed attack tables, built once at import. Boards are lists of rows,
+# so every table is indexed [row][col] the same way and holds ready-made
+# square tuples: the hot paths only look squares up, they never step
+# across the board or check its edges.
+
+DIRECTIONS = (
+    (-1, 0), (1, 0), (0, 1), (0, -1),  # Orthogonal
+    (-1, 1), (-1, -1), (1, 1), (1, -1)  # Diagonal
+)
+ORTHOGONAL = (0, 1, 2, 3)  # Indices into DIRECTIONS
+DIAGONAL = (4, 5, 6, 7)
+ALL_DIRECTIONS = ORTHOGONAL + DIAGONAL
+
+KNIGHT_OFFSETS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_OFFSETS = DIRECTIONS
+
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+def _build_rays():
+    """rays[row][col][d]: squares from (row, col) outward in direction d, nearest first"""
+    rays = [[None] * 8 for _ in range(8)]
+    for row in range(8):
+        for col in range(8):
+            square_rays = []
+            for dr, dc in DIRECTIONS:
+                ray = []
+                r, c = row + dr, col + dc
+                while _on_board(r, c):
+                    ray.append((r, c))
+                    r += dr
+                    c += dc
+                square_rays.append(tuple(ray))
+            rays[row][col] = tuple(square_rays)
+    return rays
+
+
+def _build_between(directions):
+    """
+    between[sr][sc][er][ec]: squares strictly between start and end when end
+    lies on one of their rays from start, else None.
+    """
+    between = [[[[None] * 8 for _ in range(8)] for _ in range(8)] for _ in range(8)]
+    for row in range(8):
+        for col in range(8):
+            for index in directions:
+                ray = rays[row][col][index]
+                for distance, (r, c) in enumerate(ray):
+                    between[row][col][r][c] = ray[:distance]
+    return between
+
+
+def _build_jumps(offsets):
+    return [
+        [tuple((row + dr, col + dc) for dr, dc in offsets if _on_board(row + dr, col + dc)) for col in range(8)]
+        for row in range(8)
+    ]
+
+
+rays = _build_rays()
+orthogonal_between = _build_between(ORTHOGONAL)
+diagonal_between = _build_between(DIAGONAL)
+all_between = _build_between(ALL_DIRECTIONS)
+knight_squares = _build_jumps(KNIGHT_OFFSETS)
+king_squares = _build_jumps(KING_OFFSETS)
+
+
+def sliding_targets(board, start, directions):
+    """
+    Squares reachable from start along the given rays, up to and including
+    the first occupied square. Callers filter out their own pieces.
+    """
+    targets = []
+    square_rays = rays[start[0]][start[1]]
+    for index in directions:
+        for square in square_rays[index]:
+            targets.append(square)
+            if board[square[0]][square[1]] != ' ':
+                break
+    return targets
@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import copy
+import itertools
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from chess_piece import Pawn
+from chess_board import ChessBoard
+from chess_moves import make_move, is_legal_move, is_in_check, has_no_legal_moves
+from chess_ai import select_greedy_move
+from chess_notation import parse_position, to_pgn
+
+
+# Line based protocol, one request and one response per line:
+#   NEW [ai]                     -> OK <game_id>
+#   MOVE <id> <from> <to> [q|r|b|n] -> OK <pgn> [reply=<pgn>] [result=<result>]
+#   BOARD <id>                   -> OK <placement> <turn>
+#   STATS [<id>]                 -> OK key=value ...
+#   RESIGN <id>                  -> OK result=<result>
+#   CLOSE <id>                   -> OK closed
+#   QUIT                         -> OK bye
+# Errors are answered with "ERR <message>".
+# Finished games are dropped after finished_timeout seconds and games nobody
+# has touched for idle_timeout seconds are dropped as abandoned.
+
+
+class GameSession:
+    """
+    State of one hosted game, the per-game counterpart of play_game's globals.
+    """
+    def __init__(self, game_id, vs_ai=False):
+        self.game_id = game_id
+        self.vs_ai = vs_ai  # Human plays white, AI plays black
+        self.chess_board = ChessBoard()
+        self.board = self.chess_board.board
+        self.current_turn = 'white'
+        self.last_pawn_double_move = None
+        self.move_history = []
+        self.move_count = 1
+        self.result = None
+        self.lock = asyncio.Lock()  # Serializes requests that touch this game
+        self.request_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_active = time.monotonic()
+
+    def apply_move(self, start, end, promotion='q', by_ai=False):
+        """Validates and plays a move for the side to move. Returns its PGN, raises ValueError if illegal"""
+        if self.result:
+            raise ValueError(f"Game is over ({self.result})")
+        if self.vs_ai and not by_ai and self.current_turn == 'black':
+            raise ValueError("Black is played by the AI")
+
+        piece = self.board[start[0]][start[1]]
+        if piece == ' ':
+            raise ValueError("No piece at that position")
+        if piece.color != self.current_turn:
+            raise ValueError(f"It's {self.current_turn}'s turn")
+        if not is_legal_move(self.board, start, end, self.last_pawn_double_move):
+            raise ValueError("Invalid move")
+
+        capture, self.last_pawn_double_move = make_move(self.board, start, end, self.last_pawn_double_move, promotion)
+
+        promoted = isinstance(piece, Pawn) and end[0] in (0, 7)
+        pgn_move = to_pgn(piece, start, end, capture, promotion if promoted else None)
+        if self.current_turn == 'white':
+            self.move_history.append(f"{self.move_count}. {pgn_move}")
+        else:
+            self.move_history[-1] += f" {pgn_move}"
+            self.move_count += 1
+
+        opponent = 'black' if self.current_turn == 'white' else 'white'
+        if has_no_legal_moves(self.board, opponent, self.last_pawn_double_move):
+            if is_in_check(self.board, opponent):
+                self.result = f"checkmate-{self.current_turn}"
+            else:
+                self.result = "stalemate"
+
+        self.current_turn = opponent
+        return pgn_move
+
+    def snapshot(self):
+        """Copy of the game state, for restore() if a turn has to be taken back"""
+        return copy.deepcopy((
+            self.board, self.current_turn, self.last_pawn_double_move,
+            self.move_history, self.move_count, self.result
+        ))
+
+    def restore(self, state):
+        board, self.current_turn, self.last_pawn_double_move, self.move_history, self.move_count, self.result = state
+        self.board[:] = board
+
+    def placement(self):
+        """Board rows from rank 8 to rank 1, '.' for empty squares"""
+        return '/'.join(
+            ''.join('.' if square == ' ' else str(square) for square in row)
+            for row in self.board
+        )
+
+    def memory_usage(self):
+        """Approximate per-game memory as the size of the pickled game state"""
+        return len(pickle.dumps((self.board, self.move_history, self.last_pawn_double_move)))
+
+    def record_latency(self, seconds):
+        self.last_active = time.monotonic()
+        self.request_count += 1
+        self.total_latency += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+
+class ChessServer:
+    """
+    Hosts many games in one asyncio process. AI turns run in a process pool
+    so a slow search never blocks I/O for the other games.
+    """
+    def __init__(self, workers=None, idle_timeout=600.0, finished_timeout=60.0):
+        self.games = {}
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.server = None
+        self.sweeper = None
+        self._ids = itertools.count(1)
+        self.idle_timeout = idle_timeout
+        self.finished_timeout = finished_timeout
+        self.closed_games = 0
+        self.expired_games = 0
+        self.request_count = 0
+        self.total_latency = 0.0
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.sweeper = asyncio.create_task(self._sweep())
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.sweeper:
+            self.sweeper.cancel()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line over the stream limit, readline has already discarded it
+                    writer.write(b"ERR Request too long\n")
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                started = time.perf_counter()
+                parts = line.decode(errors='replace').split()
+                if parts and parts[0].upper() == 'QUIT':
+                    writer.write(b"OK bye\n")
+                    await writer.drain()
+                    break
+
+                try:
+                    response, session = await self.dispatch(parts)
+                except ValueError as error:
+                    response, session = f"ERR {error}", None
+                except Exception as error:
+                    # Never leave a client without a response line
+                    response, session = f"ERR {error.__class__.__name__}: {error}", None
+
+                elapsed = time.perf_counter() - started
+                self.request_count += 1
+                self.total_latency += elapsed
+                if session:
+                    session.record_latency(elapsed)
+
+                writer.write((response + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, self.finished_timeout) / 2)
+            self.prune_games()
+
+    def prune_games(self, now=None):
+        """Drops finished games past finished_timeout and games idle past idle_timeout"""
+        now = time.monotonic() if now is None else now
+        for game_id, session in list(self.games.items()):
+            idle = now - session.last_active
+            if session.lock.locked():
+                continue
+            if (session.result and idle >= self.finished_timeout) or idle >= self.idle_timeout:
+                del self.games[game_id]
+                self.expired_games += 1
+
+    def get_session(self, game_id):
+        session = self.games.get(game_id)
+        if session is None:
+            raise ValueError(f"Unknown game {game_id}")
+        return session
+
+    async def dispatch(self, parts):
+        """Runs one request and returns (response line, session or None)"""
+        if not parts:
+            raise ValueError("Empty request")
+        command, args = parts[0].upper(), parts[1:]
+
+        if command == 'NEW':
+            game_id = str(next(self._ids))
+            vs_ai = bool(args) and args[0].lower() == 'ai'
+            self.games[game_id] = GameSession(game_id, vs_ai)
+            return f"OK {game_id}", None
+
+        if command == 'MOVE':
+            if len(args) not in (3, 4):
+                raise ValueError("Usage: MOVE <id> <from> <to> [q|r|b|n]")
+            session = self.get_session(args[0])
+            start = parse_position(args[1])
+            end = parse_position(args[2])
+            if not start or not end:
+                raise ValueError("Invalid square")
+            promotion = args[3].lower() if len(args) == 4 else 'q'
+            if promotion not in ('q', 'r', 'b', 'n'):
+                raise ValueError("Promotion must be one of q, r, b, n")
+            async with session.lock:
+                return await self.play_turn(session, start, end, promotion), session
+
+        if command == 'RESIGN':
+            session = self.get_session(args[0] if args else '')
+            async with session.lock:
+                if session.result:
+                    raise ValueError(f"Game is over ({session.result})")
+                session.result = f"resigned-{session.current_turn}"
+            return f"OK result={session.result}", session
+
+        if command == 'CLOSE':
+            session = self.get_session(args[0] if args else '')
+            del self.games[session.game_id]
+            self.closed_games += 1
+            return "OK closed", None
+
+        if command == 'BOARD':
+            session = self.get_session(args[0] if args else '')
+            return f"OK {session.placement()} {session.current_turn}", session
+
+        if command == 'STATS':
+            if args:
+                session = self.get_session(args[0])
+                avg_ms = 1000 * session.total_latency / session.request_count if session.request_count else 0.0
+                return (
+                    f"OK memory={session.memory_usage()} requests={session.request_count} "
+                    f"avg_ms={avg_ms:.3f} max_ms={1000 * session.max_latency:.3f}"
+                ), session
+            avg_ms = 1000 * self.total_latency / self.request_count if self.request_count else 0.0
+            memory = sum(session.memory_usage() for session in self.games.values())
+            finished = sum(1 for session in self.games.values() if session.result)
+            return (
+                f"OK games={len(self.games)} finished={finished} closed={self.closed_games} "
+                f"expired={self.expired_games} memory={memory} requests={self.request_count} avg_ms={avg_ms:.3f}"
+            ), None
+
+        raise ValueError(f"Unknown command {command}")
+
+    async def play_turn(self, session, start, end, promotion):
+        state = session.snapshot() if session.vs_ai else None
+        pgn_move = session.apply_move(start, end, promotion)
+        response = f"OK {pgn_move}"
+
+        if session.vs_ai and not session.result:
+            try:
+                move = await self.run_ai(session)
+            except Exception:
+                # Take the human move back so the game is never stuck waiting on the AI
+                session.restore(state)
+                raise
+            if move is not None:
+                response += f" reply={session.apply_move(move[0], move[1], by_ai=True)}"
+
+        if session.result:
+            response += f" result={session.result}"
+        return response
+
+    async def run_ai(self, session):
+        loop = asyncio.get_running_loop()
+        args = (select_greedy_move, session.board, session.current_turn, session.last_pawn_double_move)
+        try:
+            return await loop.run_in_executor(self.executor, *args)
+        except BrokenProcessPool:
+            # A worker died: replace the pool so every other game keeps working, then retry once
+            self.executor.shutdown(wait=False)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return await loop.run_in_executor(self.executor, *args)
+
+
+async def send_commands(commands, host='127.0.0.1', port=8765):
+    """Minimal local client: sends each command and collects the response lines"""
+    reader, writer = await asyncio.open_connection(host, port)
+    responses = []
+    try:
+        for command in commands:
+            writer.write((command + "\n").encode())
+            await writer.drain()
+            responses.append((await reader.readline()).decode().strip())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return responses
+
+
+async def main(host, port, workers):
+    server = ChessServer(workers)
+    address = await server.start(host, port)
+    print(f"Chess server listening on {address[0]}:{address[1]}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host many chess games over a line based TCP protocol")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="AI worker processes")
+    options = parser.parse_args()
+    asyncio.run(main(options.host, options.port, options.workers))
@@ -1,56 +1,25 @@
 from chess_piece import Pawn, Rook, Knight, Bishop, Queen, King
 from chess_board import ChessBoard
-import copy, random, time
+import chess_profile
+from chess_ponder import Ponderer
+from chess_moves import is_legal_move, legal_destinations, is_in_check, has_no_legal_moves
+from chess_ai import select_greedy_move
+from chess_notation import parse_position, to_pgn
+import argparse, copy, time
 
 
-# Piece values for AI targeting
-target_values = {
-    'Pawn': 1,
-    'Knight': 3,
-    'Bishop': 3,
-    'Rook': 5,
-    'Queen': 9,
-    'King': 1000
-}
-
-
-def greedy_ai_move():
+def greedy_ai_move(move=None):
+    """Plays move for black, searching for one if no pondered reply is given"""
     global board, current_turn, last_pawn_double_move, move_history, move_count
 
-    best_capture = None
-    highest_value = -1
-    legal_moves = []
-
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece != ' ' and piece.color == 'black':
-                start = (row, col)
-                for r in range(8):
-                    for c in range(8):
-                        end = (r, c)
-                        target = board[r][c]
-                        valid = piece.is_valid_move(start, end, board, last_pawn_double_move,) if isinstance(piece, Pawn) else piece.is_valid_move(start, end, board)
-
-                        if not valid:
-                            continue
-
-                        legal_moves.append((piece, start, end))
-
-                        if target != ' ' and target.color == 'white':
-                            value = target_values.get(target.__class__.__name__,0)
-                            if value > highest_value:
-                                best_capture = (piece, start, end)
-                                highest_value = value
-
-    # Choose the best capture or fallback to random legal move
-    if best_capture:
-        piece, start, end = best_capture
-    elif legal_moves:
-        piece, start, end = random.choice(legal_moves)
-    else:
+    if move is None:
+        with chess_profile.Phase('ai_select'):
+            move = select_greedy_move(board, 'black', last_pawn_double_move)
+    if move is None:
         print("AI has no legal moves.")
         return
+    start, end = move
+    piece = board[start[0]][start[1]]
 
     # Execute move
     save_game_state()
@@ -81,66 +50,25 @@ def greedy_ai_move():
     if isinstance(piece, (King, Rook)):
         piece.has_moved = True
 
-    pgn_move = to_pgn(piece, start, end, capture)
+    promotion = None
+    if isinstance(piece,Pawn) and end[0] == 7:
+        board[end[0]][end[1]] = Queen(piece.color, end)
+        promotion = 'q'
+        print("AI promoted a pawn to Queen!")
+
+    pgn_move = to_pgn(piece, start, end, capture, promotion)
     if current_turn == 'white':
         move_history.append(f"{move_count}. {pgn_move}")
     else:
         move_history[-1] += f" {pgn_move}"
         move_count += 1
 
-    if isinstance(piece,Pawn) and end[0] == 7:
-        board[end[0]][end[1]] = Queen(piece.color, end)
-        print("AI promoted a pawn to Queen!")
-
     if check_game_state(current_turn, last_pawn_double_move):
         return
 
     current_turn = 'white'
 
 
-def parse_position(pos):
-    """Converts input like 'e2' to (row, col)"""
-    if len(pos) != 2:
-        return None
-    col = ord(pos[0].lower()) - ord('a')
-    row = 8 - int(pos[1])
-    if 0 <= row < 8 and 0 <= col < 8:
-        return row, col
-    return None
-
-
-def to_pgn(piece, start, end, capture=False):
-    col_names = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
-    piece_map = {
-        'Pawn': '',
-        'Knight': 'N',
-        'Bishop': 'B',
-        'Rook': 'R',
-        'Queen': 'Q',
-        'King': 'K'
-    }
-
-    start_file = col_names[start[1]]
-    end_file = col_names[end[1]]
-    end_rank = str(8 - end[0])
-    piece_name = piece.__class__.__name__
-    symbol = piece_map.get(piece_name, '?')
-
-    # Castling
-    if piece_name == 'King' and abs(start[1] - end[1]) == 2:
-        return "O-O" if end[1] == 6 else "O-O-O"
-
-    # Pawn capture: exd5
-    if piece_name == 'Pawn' and capture:
-        return f"{start_file}x{end_file}{end_rank}"
-
-    # Regular capture: Nxe5
-    if capture:
-        return f"{symbol}x{end_file}{end_rank}"
-
-    # Normal move: Nf3 or e4
-    return f"{symbol}{end_file}{end_rank}"
-
 # Initialize board and trackers
 chess_board = ChessBoard()
 board = chess_board.board
@@ -209,73 +137,29 @@ def redo_move():
     print("Move redone.")
 
 
-def is_in_check(board, color):
-    king_pos = None
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if isinstance(piece, King) and piece.color == color:
-                king_pos = (row, col)
-                break
-        if king_pos:
-            break
-
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece != ' ' and piece.color != color:
-                if isinstance(piece, Pawn):
-                    if piece.is_valid_move((row, col), king_pos, board, None):
-                        return True
-                else:
-                    if piece.is_valid_move((row, col), king_pos, board):
-                        return True
-    return False
-
-
-def has_no_legal_moves(board, color, last_pawn_double_move):
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece != ' ' and piece.color == color:
-                for r in range(8):
-                    for c in range(8):
-                        if isinstance(piece, Pawn):
-                            if piece.is_valid_move((row, col), (r, c), board, last_pawn_double_move):
-                                saved = board[r][c]
-                                board[r][c] = piece
-                                board[row][col] = ' '
-                                if not is_in_check(board, color):
-                                    board[row][col] = piece
-                                    board[r][c] = saved
-                                    return False
-                                board[row][col] = piece
-                                board[r][c] = saved
-                        else:
-                            if piece.is_valid_move((row, col), (r, c), board):
-                                saved = board[r][c]
-                                board[r][c] = piece
-                                board[row][col] = ' '
-                                if not is_in_check(board, color):
-                                    board[row][col] = piece
-                                    board[r][c] = saved
-                                    return False
-                                board[row][col] = piece
-                                board[r][c] = saved
-    return True
+def print_hint(start):
+    destinations = legal_destinations(board, start, last_pawn_double_move)
+    if destinations:
+        print("Legal moves: " + ', '.join(f"{chr(ord('a') + c)}{8 - r}" for r, c in destinations))
+    else:
+        print("That piece has no legal moves.")
 
 
 def check_game_state(current_turn, last_pawn_double_move):
     opponent = 'black' if current_turn == 'white' else 'white'
 
-    if is_in_check(board, opponent):
-        if has_no_legal_moves(board, opponent, last_pawn_double_move):
+    with chess_profile.Phase('game_state'):
+        in_check = is_in_check(board, opponent)
+        no_legal_moves = has_no_legal_moves(board, opponent, last_pawn_double_move)
+
+    if in_check:
+        if no_legal_moves:
             chess_board.display_board()
             print(f"Checkmate! {current_turn.capitalize()} wins!")
             return True
         else:
             print(f"{opponent.capitalize()} is in check!")
-    elif has_no_legal_moves(board, opponent, last_pawn_double_move):
+    elif no_legal_moves:
         chess_board.display_board()
         print("Stalemate!")
         return True
@@ -283,18 +167,36 @@ def check_game_state(current_turn, last_pawn_double_move):
     return False
 
 
-def play_game():
+def play_game(profile_dir=None, ponder=False):
+    """
+    Interactive game loop. With profile_dir set, every AI move is run under
+    cProfile and its pstats and JSON metrics are written there. With ponder
+    set, the AI searches its replies while waiting for the human's move.
+    """
     global last_pawn_double_move, current_turn, move_history, move_count
 
+    ponderer = Ponderer(select_greedy_move) if ponder else None
+
     while True:
         chess_board.display_board()
 
         if current_turn == 'black':
             print("AI is thinking...")
-            time.sleep(1.75)
-            greedy_ai_move()
+            reply = ponderer.take_reply(board, 'black', last_pawn_double_move) if ponderer else None
+            if reply is None:
+                time.sleep(1.75)  # The thinking pause is only shown when the reply still has to be searched
+            if profile_dir:
+                # The ponder outcome is known before profile_move resets the counters, so pass it in
+                extra = {'ponder': {'hit': reply is not None, 'hits': ponderer.hits, 'misses': ponderer.misses}} if ponderer else None
+                chess_profile.profile_move(f"move_{move_count}_black", greedy_ai_move, reply,
+                                           output_dir=profile_dir, extra=extra)
+            else:
+                greedy_ai_move(reply)
             continue
 
+        if ponderer:
+            ponderer.start(board, current_turn, last_pawn_double_move)
+
         print(f"{current_turn.capitalize()}'s move:")
         start_pos = input("Enter piece to move (e.g., 'e2'): ").strip()
 
@@ -334,7 +236,7 @@ def play_game():
             continue
 
         if isinstance(piece, Pawn):
-            if piece.is_valid_move(start, end, board, last_pawn_double_move):
+            if is_legal_move(board, start, end, last_pawn_double_move):
                 save_game_state()  # Save state prior to the move
                 capture = board[end[0]][end[1]] != ' '
 
@@ -352,15 +254,8 @@ def play_game():
                 piece.position = end
                 piece.has_moved = True
 
-                # PGN Logging
-                pgn_move = to_pgn(piece, start, end, capture)
-                if current_turn == 'white':
-                    move_history.append(f"{move_count}. {pgn_move}")
-                else:
-                    move_history[-1] += f" {pgn_move}"
-                    move_count += 1
-
                 # Promotion
+                choice = None
                 if (piece.color == 'white' and end[0] == 0) or (piece.color == 'black' and end[0] == 7):
                     while True:
                         choice = input("Promote pawn to (Q)ueen, (R)ook, (B)ishop, or k(N)ight? ").strip().lower()
@@ -380,14 +275,23 @@ def play_game():
                             print("Invalid choice. Please enter Q, R, B, or N.")
                     print("Pawn promoted!")
 
+                # PGN Logging, after promotion so the new piece is recorded
+                pgn_move = to_pgn(piece, start, end, capture, choice)
+                if current_turn == 'white':
+                    move_history.append(f"{move_count}. {pgn_move}")
+                else:
+                    move_history[-1] += f" {pgn_move}"
+                    move_count += 1
+
                 if check_game_state(current_turn, last_pawn_double_move):
                     break
 
                 current_turn = 'black' if current_turn == 'white' else 'white'
             else:
                 print("Invalid move! Try again.")
+                print_hint(start)
 
-        elif piece.is_valid_move(start, end, board):
+        elif is_legal_move(board, start, end, last_pawn_double_move):
             save_game_state()  # Save state prior to the move
             capture = board[end[0]][end[1]] != ' '
 
@@ -433,6 +337,10 @@ def play_game():
             current_turn = 'black' if current_turn == 'white' else 'white'
         else:
             print("Invalid move! Try again.")
+            print_hint(start)
+
+    if ponderer:
+        ponderer.stop()
 
     # End of game: display and save PGN
     print("\nGame Over. PGN Moves:")
@@ -446,4 +354,12 @@ def play_game():
 
 # Run the game
 if __name__ == "__main__":
-    play_game()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Play chess against the greedy AI")
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='DIR',
+                        help="dump cProfile stats and JSON metrics for each AI move (default dir: profile)")
+    parser.add_argument('--ponder', action='store_true',
+                        help="let the AI search its replies while you think")
+    options = parser.parse_args()
+    if options.profile:
+        chess_profile.enable()
+    play_game(options.profile, options.ponder)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import struct
+
+import pytest
+
+import chess_export
+from chess_export import (
+    replay_pgn_game, self_play_game, game_result, decode_board, iter_records, load_shard,
+    ShardWriter, RECORD, RESULT_UNKNOWN
+)
+from chess_piece import Pawn, Knight, King
+
+
+def write_pgn(tmp_path, text):
+    path = tmp_path / "game.pgn"
+    path.write_text(text)
+    return str(path)
+
+
+def test_replay_labels_checkmate_as_white_win(tmp_path):
+    samples = replay_pgn_game(write_pgn(tmp_path, "1. e4 e5\n2. Bc4 Nc6\n3. Qh5 Nf6\n4. Qxf7\n"))
+    assert len(samples) == 7
+    assert {sample[6] for sample in samples} == {1}
+
+
+def test_replay_rejects_ambiguous_move(tmp_path):
+    with pytest.raises(ValueError, match="ambiguous move 'Nd2'"):
+        replay_pgn_game(write_pgn(tmp_path, "1. d4 a6\n2. Nf3 a5\n3. Nd2\n"))
+
+
+def test_replay_needs_promotion_piece(tmp_path):
+    moves = "1. e4 d5\n2. exd5 c6\n3. dxc6 Qb6\n4. cxb7 Kd7\n"
+    with pytest.raises(ValueError, match="unknown move 'bxa8'"):
+        replay_pgn_game(write_pgn(tmp_path, moves + "5. bxa8\n"))
+
+    samples = replay_pgn_game(write_pgn(tmp_path, moves + "5. bxa8=N Ke8\n"))
+    # The position before Ke8 has a white knight on a8
+    assert decode_board(samples[-1][1])[0][0] == 'N'
+
+
+def test_shards_round_trip(tmp_path):
+    samples = replay_pgn_game(write_pgn(tmp_path, "1. e4 e5\n2. Bc4 Nc6\n3. Qh5 Nf6\n4. Qxf7\n"))
+    with ShardWriter(str(tmp_path / "shards"), records_per_shard=4) as writer:
+        for sample in samples + samples:
+            writer.write(sample)
+    assert (writer.written, writer.duplicates, writer.shard_index) == (7, 7, 2)
+
+    records = []
+    for name in ("shard_00000.bin", "shard_00001.bin"):
+        records += iter_records(str(tmp_path / "shards" / name))
+    assert [list(record) for record in records] == samples
+
+
+def test_header_counts_records_and_rejects_truncated_shards(tmp_path):
+    samples = replay_pgn_game(write_pgn(tmp_path, "1. e4 e5\n2. Bc4 Nc6\n3. Qh5 Nf6\n4. Qxf7\n"))
+    with ShardWriter(str(tmp_path / "shards")) as writer:
+        for sample in samples:
+            writer.write(sample)
+
+    path = tmp_path / "shards" / "shard_00000.bin"
+    data = path.read_bytes()
+    assert struct.unpack('<I', data[12:16])[0] == len(samples)
+
+    path.write_bytes(data[:-RECORD.size])
+    with pytest.raises(ValueError, match="truncated"):
+        list(iter_records(str(path)))
+
+
+def test_numpy_loader_matches_record_layout(tmp_path):
+    numpy = pytest.importorskip('numpy')
+    samples = replay_pgn_game(write_pgn(tmp_path, "1. e4 e5\n2. Bc4 Nc6\n3. Qh5 Nf6\n4. Qxf7\n"))
+    with ShardWriter(str(tmp_path / "shards")) as writer:
+        for sample in samples:
+            writer.write(sample)
+
+    path = str(tmp_path / "shards" / "shard_00000.bin")
+    array = load_shard(path)
+    assert array.dtype.itemsize == RECORD.size
+    records = list(iter_records(path))
+    assert len(array) == len(records)
+    for row, record in zip(array, records):
+        assert row['board'].tobytes() == record[1]
+        values = [row[name].item() for name in array.dtype.names if name != 'board']
+        assert values == [field for index, field in enumerate(record) if index != 1]
+    assert numpy.array_equal(array['result'], [sample[6] for sample in samples])
+
+
+def test_bare_kings_are_a_draw():
+    board = [[' ' for _ in range(8)] for _ in range(8)]
+    board[7][4] = King('white', (7, 4))
+    board[0][4] = King('black', (0, 4))
+    board[4][4] = Knight('white', (4, 4))
+    assert game_result(board, 'black', None) == 0
+
+    board[4][3] = Pawn('black', (4, 3))
+    assert game_result(board, 'black', None) == RESULT_UNKNOWN
+
+
+def test_capped_self_play_is_adjudicated_by_material(monkeypatch):
+    moves = iter([((6, 4), (4, 4)), ((1, 3), (3, 3)), ((4, 4), (3, 3))])  # e4 d5 exd5
+    monkeypatch.setattr(chess_export, 'select_greedy_move', lambda board, color, ep: next(moves))
+    assert {sample[6] for sample in self_play_game(max_plies=3)} == {RESULT_UNKNOWN}
+
+    moves = iter([((6, 4), (4, 4)), ((1, 3), (3, 3)), ((4, 4), (3, 3))])
+    samples = self_play_game(max_plies=3, adjudicate=100)
+    assert len(samples) == 3 and {sample[6] for sample in samples} == {1}
@@ -0,0 +1,57 @@
+import copy
+
+from chess_board import ChessBoard
+from chess_piece import Pawn, Rook, Knight, Bishop, Queen, King
+from chess_moves import generate_legal_moves, make_move, legal_moves, is_legal_move, move_cache
+
+
+pieces_by_symbol = {'p': Pawn, 'r': Rook, 'n': Knight, 'b': Bishop, 'q': Queen, 'k': King}
+
+
+def board_from_fen(placement):
+    """Board from the piece placement field of a FEN string, all castling rights intact"""
+    board = [[' ' for _ in range(8)] for _ in range(8)]
+    for row, rank in enumerate(placement.split('/')):
+        col = 0
+        for symbol in rank:
+            if symbol.isdigit():
+                col += int(symbol)
+                continue
+            color = 'white' if symbol.isupper() else 'black'
+            board[row][col] = pieces_by_symbol[symbol.lower()](color, (row, col))
+            col += 1
+    return board
+
+
+def perft(board, color, last_pawn_double_move, depth):
+    """Number of leaf positions after depth plies"""
+    moves = generate_legal_moves(board, color, last_pawn_double_move)
+    if depth == 1:
+        return len(moves)
+    opponent = 'black' if color == 'white' else 'white'
+    nodes = 0
+    for start, end in moves:
+        child = copy.deepcopy(board)
+        _, double_move = make_move(child, start, end, last_pawn_double_move)
+        nodes += perft(child, opponent, double_move, depth - 1)
+    return nodes
+
+
+def test_perft_start_position():
+    board = ChessBoard().board
+    assert [perft(board, 'white', None, depth) for depth in (1, 2, 3)] == [20, 400, 8902]
+
+
+def test_perft_kiwipete():
+    board = board_from_fen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R')
+    assert [perft(board, 'white', None, depth) for depth in (1, 2)] == [48, 2039]
+
+
+def test_cache_rejects_self_check_and_reuses_entries():
+    board = board_from_fen('k7/8/8/8/8/8/6R1/4K2r')  # White king in check from h1
+    assert not is_legal_move(board, (6, 6), (6, 0), None)
+    assert is_legal_move(board, (6, 6), (7, 6), None)  # Block on g1
+
+    hits = move_cache.hits
+    legal_moves(board, 'white', None)
+    assert move_cache.hits == hits + 1
@@ -0,0 +1,63 @@
+import time
+
+from chess_board import ChessBoard
+from chess_moves import legal_moves, make_move, position_hash
+from chess_ponder import Ponderer
+
+
+def first_legal_move(board, color, last_pawn_double_move):
+    """Deterministic stand-in for the AI search"""
+    moves = legal_moves(board, color, last_pawn_double_move)
+    return moves[0] if moves else None
+
+
+def wait_for_reply(ponderer, board, color, last_pawn_double_move, timeout=5.0):
+    """Polls until the background thread has stored a reply for this position"""
+    key = position_hash(board, color, last_pawn_double_move)
+    deadline = time.monotonic() + timeout
+    while key not in ponderer.replies and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return ponderer.replies.get(key)
+
+
+def test_ponder_hit_returns_stored_reply():
+    board = ChessBoard().board
+    ponderer = Ponderer(first_legal_move)
+    ponderer.start(board, 'white', None)
+
+    _, double_move = make_move(board, (6, 4), (4, 4), None)  # e2e4
+    stored = wait_for_reply(ponderer, board, 'black', double_move)
+    assert stored is not None
+
+    assert ponderer.take_reply(board, 'black', double_move) == stored
+    assert (ponderer.hits, ponderer.misses) == (1, 0)
+    assert ponderer.thread is None
+
+
+def test_ponder_miss_returns_none():
+    board = ChessBoard().board
+    ponderer = Ponderer(first_legal_move)
+    ponderer.start(board, 'white', None)
+    ponderer.stop()
+    ponderer.replies.clear()  # Whatever was searched before stop() is gone
+
+    _, double_move = make_move(board, (6, 3), (4, 3), None)  # d2d4
+    assert ponderer.take_reply(board, 'black', double_move) is None
+    assert (ponderer.hits, ponderer.misses) == (0, 1)
+
+
+def test_stop_without_thread_is_harmless():
+    ponderer = Ponderer(first_legal_move)
+    ponderer.stop()
+    assert ponderer.thread is None
+
+
+def test_illegal_stored_reply_is_rejected():
+    board = ChessBoard().board
+    ponderer = Ponderer(first_legal_move)
+    key = position_hash(board, 'black', None)
+    # A pawn jumping three squares, then a white move offered as black's reply
+    for reply in (((1, 4), (4, 4)), ((6, 4), (4, 4))):
+        ponderer.replies[key] = reply
+        assert ponderer.take_reply(board, 'black', None) is None
+    assert (ponderer.hits, ponderer.misses) == (0, 2)
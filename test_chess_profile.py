@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+import chess_profile
+from chess_board import ChessBoard
+from chess_moves import legal_moves, move_cache
+
+
+@pytest.fixture
+def instrumentation():
+    """Leaves instrumentation disabled and the metrics empty after each test"""
+    chess_profile.reset()
+    move_cache.clear()
+    yield
+    chess_profile.disable()
+    chess_profile.reset()
+
+
+def test_profile_move_writes_stats_and_counters(tmp_path, instrumentation):
+    board = ChessBoard().board
+    chess_profile.enable()
+    moves = chess_profile.profile_move("move_1_white", legal_moves, board, 'white', None,
+                                       output_dir=str(tmp_path), extra={'ponder': None})
+    assert len(moves) == 20
+
+    assert (tmp_path / "move_1_white.pstats").exists()
+    metrics = json.loads((tmp_path / "move_1_white.json").read_text())
+    assert metrics['move'] == "move_1_white"
+    assert 'ponder' in metrics
+    for name in ('movegen', 'tt_probe', 'check_test'):
+        assert metrics['counters'][name] > 0
+    assert metrics['timers']['movegen'] > 0
+
+
+def test_disabled_instrumentation_records_nothing(instrumentation):
+    chess_profile.disable()
+    with chess_profile.Phase('movegen'):
+        legal_moves(ChessBoard().board, 'white', None)
+    assert chess_profile.snapshot() == {'counters': {}, 'timers': {}}
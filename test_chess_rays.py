@@ -0,0 +1,89 @@
+import random
+
+from chess_piece import Pawn, Rook, Knight, Bishop, Queen, King
+from chess_moves import is_in_check
+
+
+def reference_slide(start, end, board, straight, diagonal):
+    """The step-by-step path walk the pieces used before the ray tables"""
+    start_row, start_col = start
+    end_row, end_col = end
+    if (start_row == end_row or start_col == end_col) and straight:
+        step_row = 0 if start_row == end_row else (1 if end_row > start_row else -1)
+        step_col = 0 if start_col == end_col else (1 if end_col > start_col else -1)
+    elif abs(start_row - end_row) == abs(start_col - end_col) and diagonal:
+        step_row = 1 if end_row > start_row else -1
+        step_col = 1 if end_col > start_col else -1
+    else:
+        return False
+
+    row, col = start_row + step_row, start_col + step_col
+    while (row, col) != (end_row, end_col):
+        if board[row][col] != ' ':
+            return False
+        row += step_row
+        col += step_col
+
+    target_piece = board[end_row][end_col]
+    return target_piece == ' ' or target_piece.color != board[start_row][start_col].color
+
+
+def reference_in_check(board, color):
+    """Asks every enemy piece whether it can move onto the king"""
+    king_pos = next(
+        (row, col) for row in range(8) for col in range(8)
+        if isinstance(board[row][col], King) and board[row][col].color == color
+    )
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece != ' ' and piece.color != color:
+                if isinstance(piece, Pawn):
+                    if piece.is_valid_move((row, col), king_pos, board, None):
+                        return True
+                elif piece.is_valid_move((row, col), king_pos, board):
+                    return True
+    return False
+
+
+def random_board(rng):
+    """Both kings plus a random scatter of other pieces, pawns kept off the back ranks"""
+    board = [[' ' for _ in range(8)] for _ in range(8)]
+    squares = rng.sample([(row, col) for row in range(8) for col in range(8)], 2 + rng.randint(4, 20))
+    for (row, col), color in zip(squares, ('white', 'black')):
+        king = King(color, (row, col))
+        king.has_moved = True  # Castling is not an attack
+        board[row][col] = king
+    for row, col in squares[2:]:
+        kinds = (Rook, Knight, Bishop, Queen) if row in (0, 7) else (Pawn, Rook, Knight, Bishop, Queen)
+        board[row][col] = rng.choice(kinds)(rng.choice(('white', 'black')), (row, col))
+    return board
+
+
+def test_sliders_match_path_walk():
+    rng = random.Random(7)
+    squares = [(row, col) for row in range(8) for col in range(8)]
+    for _ in range(200):
+        board = random_board(rng)
+        for row, col in squares:
+            piece = board[row][col]
+            if not isinstance(piece, (Rook, Bishop, Queen)):
+                continue
+            straight = isinstance(piece, (Rook, Queen))
+            diagonal = isinstance(piece, (Bishop, Queen))
+            for end in squares:
+                assert piece.is_valid_move((row, col), end, board) == \
+                    reference_slide((row, col), end, board, straight, diagonal), (str(piece), (row, col), end)
+
+
+def test_in_check_matches_every_piece_rule():
+    rng = random.Random(11)
+    checks = 0
+    for _ in range(2000):
+        board = random_board(rng)
+        for color in ('white', 'black'):
+            expected = reference_in_check(board, color)
+            assert is_in_check(board, color) == expected
+            checks += expected
+    # Make sure the sample covers both answers
+    assert 0 < checks < 4000
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+
+from chess_server import ChessServer, GameSession, send_commands
+
+
+def run_session(commands, configure=None):
+    """Starts a server on a free port, sends commands from a local client and returns the responses"""
+    async def scenario():
+        server = ChessServer(workers=1)
+        if configure:
+            configure(server)
+        host, port = await server.start('127.0.0.1', 0)
+        try:
+            return server, await send_commands(commands, host, port)
+        finally:
+            await server.close()
+
+    return asyncio.run(scenario())
+
+
+def test_two_player_game_until_checkmate():
+    _, responses = run_session([
+        'NEW',
+        'MOVE 1 f2 f3',
+        'MOVE 1 e7 e5',
+        'MOVE 1 e1 e3',  # Illegal king move
+        'MOVE 1 g2 g4',
+        'MOVE 1 d8 h4',
+        'MOVE 1 a2 a3',
+        'BOARD 1',
+    ])
+    assert responses[:3] == ['OK 1', 'OK f3', 'OK e5']
+    assert responses[3] == 'ERR Invalid move'
+    assert responses[4] == 'OK g4'
+    assert responses[5] == 'OK Qh4 result=checkmate-black'
+    assert responses[6].startswith('ERR Game is over')
+    assert responses[7] == 'OK rnb.kbnr/pppp.ppp/......../....p.../......Pq/.....P../PPPPP..P/RNBQKBNR white'
+
+
+def test_ai_replies_and_stats():
+    _, responses = run_session(['NEW ai', 'MOVE 1 e2 e4', 'STATS 1', 'STATS'])
+    assert responses[0] == 'OK 1'
+    assert responses[1].startswith('OK e4 reply=')
+    assert 'memory=' in responses[2] and 'requests=1' in responses[2]
+    assert responses[3].startswith('OK games=1 finished=0 closed=0 expired=0 ')
+
+
+def test_errors_are_reported():
+    _, responses = run_session(['MOVE 7 e2 e4', 'NEW', 'MOVE 1 e7 e5', 'MOVE 1 z9 e4', 'FLY 1'])
+    assert responses[0] == 'ERR Unknown game 7'
+    assert responses[2] == "ERR It's white's turn"
+    assert responses[3] == 'ERR Invalid square'
+    assert responses[4] == 'ERR Unknown command FLY'
+
+
+def test_unexpected_failure_still_answers():
+    async def failing_ai(session):
+        raise RuntimeError("worker crashed")
+
+    def configure(server):
+        server.run_ai = failing_ai
+
+    _, responses = run_session(['NEW ai', 'MOVE 1 e2 e4', 'BOARD 1', 'MOVE 1 e7 e5'], configure)
+    assert responses[1] == 'ERR RuntimeError: worker crashed'
+    # The human move was taken back, so white is still to move from the start position
+    assert responses[2] == 'OK rnbqkbnr/pppppppp/......../......../......../......../PPPPPPPP/RNBQKBNR white'
+    assert responses[3] == "ERR It's white's turn"
+
+
+def test_malformed_lines_are_answered():
+    async def scenario():
+        server = ChessServer(workers=1)
+        host, port = await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            responses = []
+            for line in (b'\xff\xfe NEW\n', b'NEW ' + b'x' * 70000 + b'\n', b'NEW\n'):
+                writer.write(line)
+                await writer.drain()
+                responses.append((await reader.readline()).decode().strip())
+            return responses
+        finally:
+            writer.close()
+            await writer.wait_closed()
+            await server.close()
+
+    responses = asyncio.run(scenario())
+    assert responses[0] == 'ERR Unknown command \ufffd\ufffd'
+    assert responses[1] == 'ERR Request too long'
+    assert responses[2] == 'OK 1'
+
+
+def test_client_cannot_move_for_the_ai():
+    game = GameSession('1', vs_ai=True)
+    assert game.apply_move((6, 4), (4, 4)) == 'e4'
+    with pytest.raises(ValueError, match="Black is played by the AI"):
+        game.apply_move((1, 4), (3, 4))
+    assert game.apply_move((1, 4), (3, 4), by_ai=True) == 'e5'
+
+
+def test_resign_close_and_expiry():
+    server, responses = run_session(['NEW', 'NEW', 'NEW', 'RESIGN 1', 'CLOSE 2', 'BOARD 2', 'STATS'])
+    assert responses[3] == 'OK result=resigned-white'
+    assert responses[4] == 'OK closed'
+    assert responses[5] == 'ERR Unknown game 2'
+    assert responses[6].startswith('OK games=2 finished=1 closed=1 expired=0 ')
+
+    # Finished games go first, idle ones once idle_timeout has passed
+    now = time.monotonic()
+    server.prune_games(now + server.finished_timeout)
+    assert list(server.games) == ['3']
+    server.prune_games(now + server.idle_timeout)
+    assert server.games == {}
+    assert server.expired_games == 2